@@ -2,81 +2,36 @@
 import streamlit as st
 import os
 import re
-import json
 import time
-import tempfile
-from typing import Tuple, List, Optional
-
-# ---------- Dependencies used by original script (pdfplumber, python-docx) ----------
-try:
-    import pdfplumber
-except Exception:
-    pdfplumber = None
-
-try:
-    import docx
-except Exception:
-    docx = None
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Tuple, List
+
+from skill_common import (
+    pymupdf,
+    extract_text, finalize_skills, categorize_skills,
+    call_gemini_for_skills, call_gemini_for_skills_batch, lookup_answers, remember_answers,
+    file_digest, lookup_text, remember_text,
+)
 
-# ---------- Minimal Gemini client wrapper (optional) ----------
-# We'll try to import the same client used in your script. If missing or key missing,
-# the app will fallback to the local keyword scan.
-GEMINI_CLIENT = None
+# pyahocorasick speeds up the local keyword scan; the regex loop is used without it
 try:
-    from google import genai as _genai
-    GEMINI_CLIENT = _genai
+    import ahocorasick
 except Exception:
-    GEMINI_CLIENT = None
+    ahocorasick = None
 
 # ---------- KEY RETRIEVAL ----------
 def get_gemini_key() -> str:
-    # 1) Streamlit Cloud secrets (secrets.toml)
+    # 1) Streamlit Cloud secrets (secrets.toml); st.secrets raises when no file exists
     try:
-        if "GEMINI_API_KEY" in st.secrets:
-            return st.secrets["GEMINI_API_KEY"]
+        key = st.secrets.get("GEMINI_API_KEY")
+        if key:
+            return key
     except Exception:
         pass
     # 2) Environment variable
-    if os.getenv("GEMINI_API_KEY"):
-        return os.getenv("GEMINI_API_KEY")
-    return ""
-
-# ---------- Text extraction (copied/adapted from your script) ----------
-def extract_text_from_pdf(path: str) -> str:
-    if pdfplumber is None:
-        raise RuntimeError("Install pdfplumber: pip install pdfplumber")
-    parts = []
-    with pdfplumber.open(path) as pdf:
-        for p in pdf.pages:
-            parts.append(p.extract_text() or "")
-    return re.sub(r'\s+', ' ', " ".join(parts)).strip()
-
-def extract_text_from_docx(path: str) -> str:
-    if docx is None:
-        raise RuntimeError("Install python-docx: pip install python-docx")
-    d = docx.Document(path)
-    parts = [p.text for p in d.paragraphs if p.text and p.text.strip()]
-    for table in d.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                if cell.text and cell.text.strip():
-                    parts.append(cell.text.strip())
-    return re.sub(r'\s+', ' ', " ".join(parts)).strip()
-
-def extract_text_from_txt(path: str) -> str:
-    with open(path, "rb") as f:
-        raw = f.read()
-    return re.sub(r'\s+', ' ', raw.decode('utf-8', errors='ignore')).strip()
-
-def extract_text(path: str) -> str:
-    p = path.lower()
-    if p.endswith(".pdf"):
-        return extract_text_from_pdf(path)
-    if p.endswith(".docx"):
-        return extract_text_from_docx(path)
-    if p.endswith(".txt"):
-        return extract_text_from_txt(path)
-    raise ValueError("Unsupported file type. Supported: .pdf, .docx, .txt")
+    return os.environ.get("GEMINI_API_KEY", "")
 
 # ---------- Local keyword list (same as your script) ----------
 BASE_KEYWORDS = [
@@ -96,202 +51,170 @@ BASE_KEYWORDS = [
     "linux", "bash", "shell", "systemd", "sysvinit", "excel", "tableau", "power bi", "docker-compose"
 ]
 
-# ---------- Normalization logic (adapted) ----------
-NORMALIZE_MAP = {
-    "react.js": "react",
-    "reactjs": "react",
-    "nodejs": "node.js",
-    "node js": "node.js",
-    "powerbi": "power bi",
-    "u boot": "u-boot",
-    "u_boot": "u-boot",
-    "device-tree": "device tree",
-    "embedded c": "c",
-    "c plus plus": "c++",
-    "cplusplus": "c++",
-    "usb 3 0": "usb 3.0",
-    "usb3.0": "usb 3.0",
-    "wi fi": "wi-fi",
-    "wi-fi": "wi-fi",
-    "i 2 c": "i2c",
-    "i 2 s": "i2s",
-    "yocto project": "yocto",
-    "petalinux sdk": "petalinux",
-    "system verilog": "systemverilog",
-    "devops": "devops",
-    "microcontrollers": "microcontroller"
-}
-
-def normalize_token(tok: str) -> str:
-    if not tok:
-        return tok
-    s = tok.strip().lower()
-    s = re.sub(r'[\_\t]+', ' ', s)
-    s = re.sub(r'\s*[\/\\]+\s*', ' / ', s)
-    s = s.replace(',', ' ')
-    s = re.sub(r'\s+', ' ', s)
-    for k, v in NORMALIZE_MAP.items():
-        if s == k or k in s:
-            s = s.replace(k, v)
-    s = re.sub(r'(?<!\d)\.(?!\d)', ' ', s)
-    s = s.strip()
-    s = re.sub(r'\busb\s+3\s+0\b', 'usb 3.0', s)
-    s = re.sub(r'\s+', ' ', s)
-    if s == 'node':
-        s = 'node.js'
-    if s == 'reactjs':
-        s = 'react'
-    return s
-
-def dedupe_preserve_order(items: List[str]) -> List[str]:
-    seen = set()
-    out = []
-    for x in items:
-        if x not in seen:
-            seen.add(x)
-            out.append(x)
-    return out
-
-# ---------- Categorization sets (same categories) ----------
-LANGUAGES = {"c", "c++", "c#", "python", "java", "javascript", "typescript", "go", "rust", "ruby", "php", "scala", "kotlin", "swift", "r"}
-TOOLS = {"git", "gdb", "cmake", "make", "gcc", "clang", "vivado", "quartus", "jtag", "docker", "helm", "ansible"}
-PROTOCOLS = {"i2c", "spi", "uart", "gpio", "pcie", "usb", "ethernet", "can", "i2s", "wi-fi", "wifi", "lte", "bluetooth"}
-PLATFORMS = {"embedded linux", "yocto", "petalinux", "u-boot", "raspberry pi", "stm32", "arm", "nxp", "imx", "xilinx zynq", "xilinx rfsoc", "xilinx mpsoc"}
-DRIVERS = {"kernel drivers", "device drivers", "driver development", "bootloader", "board bring-up", "bsp", "firmware", "kernel", "linux kernel"}
-OTHER_HINTS = {"linux", "bash", "shell", "systemd", "sysvinit", "excel", "tableau", "power bi", "etl", "spark", "hadoop"}
-
-def categorize_skill(skill: str) -> str:
-    low = skill.lower()
-    if low in LANGUAGES:
-        return "languages"
-    if low in TOOLS:
-        return "tools"
-    if low in PROTOCOLS:
-        return "protocols"
-    if low in PLATFORMS:
-        return "platforms"
-    if low in DRIVERS:
-        return "drivers"
-    if low in OTHER_HINTS:
-        return "other"
-    if any(k in low for k in ("driver", "kernel", "bootloader", "bsp", "board bring-up", "firmware")):
-        return "drivers"
-    if any(k in low for k in ("linux", "embedded", "yocto", "petalinux", "u-boot")):
-        return "platforms"
-    if any(k in low for k in ("aws", "azure", "gcp", "docker", "kubernetes", "terraform", "ansible")):
-        return "tools"
-    if any(k in low for k in ("i2c", "spi", "uart", "gpio", "usb", "ethernet", "can", "i2s", "bluetooth", "wi-fi")):
-        return "protocols"
-    if any(k in low for k in ("python", "java", "c++", "c#", "javascript", "typescript", "go", "rust")):
-        return "languages"
-    return "other"
-
-# ---------- Gemini prompt builder (same rules) ----------
-def build_skills_prompt(resume_text: str, max_chars=15000) -> str:
-    if len(resume_text) > max_chars:
-        resume_text = resume_text[:max_chars]
-    prompt = f'''
-You are an extractor. Given the resume text below, return ONLY a single JSON object:
-
-{{"skills": [<list of canonical short skill strings>] }}
-
-Rules:
-- Return skill tokens like "python", "c++", "embedded linux", "device tree", "u-boot", "yocto", "i2c", "spi", "git".
-- Normalize common variants (react.js -> react, node js -> node.js, powerbi -> power bi).
-- Deduplicate and return only skills actually mentioned in the resume.
-- Do NOT include company names, addresses, or long descriptive sentences.
-- Output EXACTLY one JSON object and nothing else.
-
-Resume:
-\"\"\"{resume_text}\"\"\"
-'''.strip()
-    return prompt
+# a keyword must not be glued to other word characters on a side that ends in a word
+# character; plain \b also demanded a word character right after the "+" of "c++" or
+# "#" of "c#", so "c++," and "c#" were never found while "c++11" was.
+# keywords made only of word characters match exactly when they are a whole \w+ run,
+# so a set lookup on the text's tokens finds them; the rest (c++, node.js,
+# multi-word phrases) need a real scan
+_RE_WORD = re.compile(r'\w+')
+_KW_INDEX = {kw: i for i, kw in enumerate(BASE_KEYWORDS)}
+_WORD_KW = frozenset(kw for kw in BASE_KEYWORDS if _RE_WORD.fullmatch(kw))
+_PHRASE_KW = [kw for kw in BASE_KEYWORDS if kw not in _WORD_KW]
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _is_free(text: str, i: int) -> bool:
+    # position i is outside the text or holds a non-word character
+    return i < 0 or i >= len(text) or not _is_word_char(text[i])
+
+# one alternation over all phrase keywords, longest first; wrapped in a lookahead so
+# overlapping phrases ("embedded linux kernel") are all reported in a single pass
+def _kw_pattern(kw: str) -> str:
+    left = r'(?<!\w)' if _is_word_char(kw[0]) else ''
+    right = r'(?!\w)' if _is_word_char(kw[-1]) else ''
+    return left + re.escape(kw) + right
+
+_KW_PHRASE_RE = re.compile(
+    r'(?=(' + '|'.join(_kw_pattern(kw) for kw in sorted(_PHRASE_KW, key=len, reverse=True)) + r'))'
+)
 
-def call_gemini_for_skills(resume_text: str, api_key: str, max_retries=2) -> Tuple[Optional[List[str]], str]:
-    if not api_key or GEMINI_CLIENT is None:
-        return None, ""
-    prompt = build_skills_prompt(resume_text)
-    try:
-        client = GEMINI_CLIENT.Client(api_key=api_key)
-    except Exception:
-        # some installs use genai.Client(...) or google.generativeai, try alternative
-        try:
-            GEMINI_CLIENT.configure(api_key=api_key)
-            client = GEMINI_CLIENT
-        except Exception:
-            return None, ""
-    for attempt in range(max_retries + 1):
-        try:
-            resp = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
-            raw = resp.text if hasattr(resp, "text") else str(resp)
-            m = re.search(r'\{.*\}', raw, flags=re.DOTALL)
-            if m:
-                try:
-                    obj = json.loads(m.group(0))
-                    skills = obj.get("skills", [])
-                    if isinstance(skills, list):
-                        return skills, raw
-                except Exception:
-                    pass
-            arr_match = re.search(r'\[\s*([^\]]+?)\s*\]', raw, flags=re.DOTALL)
-            if arr_match:
-                items = re.findall(r'["\']([^"\']+)["\']', arr_match.group(0))
-                if items:
-                    return items, raw
-            return None, raw
-        except Exception as e:
-            if attempt < max_retries:
-                time.sleep(0.6*(attempt+1))
+# single-pass automaton over the phrase keywords (payload keeps BASE_KEYWORDS order);
+# it depends only on its argument, so one build serves every rerun and session
+@st.cache_resource(show_spinner=False)
+def build_keyword_automaton(phrases: Tuple[Tuple[int, str], ...]):
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, kw in phrases:
+        automaton.add_word(kw, (idx, len(kw), _is_word_char(kw[0]), _is_word_char(kw[-1])))
+    automaton.make_automaton()
+    return automaton
+
+_KW_AUTOMATON = build_keyword_automaton(tuple((_KW_INDEX[kw], kw) for kw in _PHRASE_KW))
+
+def scan_keywords(text_low: str) -> List[str]:
+    hits = {_KW_INDEX[kw] for kw in _WORD_KW.intersection(_RE_WORD.findall(text_low))}
+    if _KW_AUTOMATON is None:
+        hits.update(_KW_INDEX[m.group(1)] for m in _KW_PHRASE_RE.finditer(text_low))
+    else:
+        for end, (idx, size, check_left, check_right) in _KW_AUTOMATON.iter(text_low):
+            if check_left and not _is_free(text_low, end - size):
                 continue
-            return None, "<error: {}>".format(e)
-
-# ---------- Processing a single resume file ----------
-def process_resume_file(path: str, api_key: str):
-    text = extract_text(path)
-
-    skills_raw, raw_model = call_gemini_for_skills(text, api_key)
-    if skills_raw is None:
-        # fallback local keyword scanner
-        found = []
-        text_low = text.lower()
-        for kw in BASE_KEYWORDS:
-            if re.search(r'\b' + re.escape(kw) + r'\b', text_low):
-                found.append(kw)
-        skills_raw = found
-
-    normalized = []
-    for s in skills_raw:
-        if not isinstance(s, str):
-            continue
-        tok = normalize_token(s)
-        if not tok:
-            continue
-        normalized.append(tok)
-
-    normalized = dedupe_preserve_order(normalized)
-
-    final = []
-    for s in normalized:
-        s2 = s.strip()
-        for k, v in NORMALIZE_MAP.items():
-            if s2 == k or k in s2:
-                s2 = s2.replace(k, v)
-        s2 = re.sub(r'\s+', ' ', s2).strip()
-        final.append(s2)
-    final = dedupe_preserve_order(final)
-
-    categories = {"languages": [], "tools": [], "protocols": [], "platforms": [], "drivers": [], "other": []}
-    for s in final:
-        cat = categorize_skill(s)
-        categories[cat].append(s)
-
+            if not check_right or _is_free(text_low, end + 1):
+                hits.add(idx)
+    return [BASE_KEYWORDS[i] for i in sorted(hits)]
+
+# ---------- Processing resume files ----------
+# a resume already naming this many BASE_KEYWORDS is answered from the local scan
+LOCAL_CONFIDENCE_THRESHOLD = 15
+# longest the Gemini stage may take before the local scan is used instead
+GEMINI_DEADLINE_S = 15.0
+
+def build_resume_result(text: str, skills_raw: List[str], raw_model: str):
+    final = finalize_skills(skills_raw)
     return {
         "all_skills": final,
-        "categories": categories,
+        "categories": categorize_skills(final),
         "raw_model_output_preview": (raw_model or "")[:1000],
         "text_snippet": text[:2000]
     }
 
+def _extraction_pool(files: List[Tuple[str, bytes, str]]):
+    # PyMuPDF parses in C and releases the GIL, so threads are enough; only
+    # pdfplumber's pure-Python layout code is worth separate processes
+    n = len(files)
+    if (n > 1 and pymupdf is None and any(ext == ".pdf" for _, _, ext in files)
+            and "fork" in multiprocessing.get_all_start_methods()):
+        workers = min(8, os.cpu_count() or 1, n)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(max_workers=min(8, n))
+
+def process_resume_batch(files: List[Tuple[str, bytes, str]], api_key: str) -> List[dict]:
+    # files are (digest, data, ext); extract the ones not parsed before, then ask
+    # Gemini about all of them in a single request
+    results = [None] * len(files)
+    texts = {}
+    todo = []
+    for i, (digest, _, _) in enumerate(files):
+        text = lookup_text(digest)
+        if text is None:
+            todo.append(i)
+        else:
+            texts[i] = text
+    if todo:
+        with _extraction_pool([files[i] for i in todo]) as ex:
+            futs = [(i, ex.submit(extract_text, files[i][1], files[i][2], len(todo) == 1)) for i in todo]
+            for i, fut in futs:
+                try:
+                    texts[i] = fut.result()
+                except Exception as e:
+                    results[i] = {"error": str(e)}
+                    continue
+                remember_text(files[i][0], texts[i])
+    order = sorted(texts)
+    local = {i: scan_keywords(texts[i].lower()) for i in order}
+    # keyword-dense resumes gain little from the model, so they skip the round trip
+    ask = [i for i in order if len(local[i]) < LOCAL_CONFIDENCE_THRESHOLD] if api_key else []
+    model = _ask_gemini(ask, texts, api_key)
+    for i in order:
+        skills_raw, raw = model.get(i, (None, ""))
+        results[i] = build_resume_result(texts[i], local[i] if skills_raw is None else skills_raw, raw)
+    return results
+
+def _ask_gemini(ids: List[int], texts: dict, api_key: str) -> dict:
+    # batched request plus per-resume retries, all bounded by GEMINI_DEADLINE_S;
+    # resumes without an answer by then use the local scan
+    out = {}
+    for i, skills in zip(ids, lookup_answers([texts[i] for i in ids])):
+        if skills is not None:
+            out[i] = (skills, "")
+    ids = [i for i in ids if i not in out]
+    if not ids:
+        return out
+    deadline = time.monotonic() + GEMINI_DEADLINE_S
+    # network-bound work, so threads are enough
+    ex = ThreadPoolExecutor(max_workers=min(8, len(ids)))
+    try:
+        fut = ex.submit(call_gemini_for_skills_batch, [texts[i] for i in ids], api_key, "resumes")
+        try:
+            batch, raw_model = fut.result(timeout=GEMINI_DEADLINE_S)
+        except FuturesTimeout:
+            fut.add_done_callback(lambda f, t=[texts[i] for i in ids]: _remember_late(f, t))
+            return out
+        if batch is None:
+            return out
+        # resumes the batched answer did not cover get their own request
+        retry = {}
+        for i, skills in zip(ids, batch):
+            if skills is None:
+                retry[i] = ex.submit(call_gemini_for_skills, texts[i], api_key)
+            else:
+                out[i] = (skills, raw_model)
+        done, _ = wait(retry.values(), timeout=max(0.0, deadline - time.monotonic()))
+        for i, f in retry.items():
+            if f in done:
+                out[i] = f.result()
+            else:
+                f.add_done_callback(lambda f, t=[texts[i]]: _remember_late(f, t, single=True))
+        remember_answers([(texts[i], out[i][0]) for i in ids if i in out and out[i][0] is not None])
+        return out
+    finally:
+        # requests that missed the deadline finish in the background instead of blocking
+        ex.shutdown(wait=False)
+
+def _remember_late(fut, doc_texts: List[str], single: bool = False):
+    # a request that missed the deadline is still billed: keep its answer for the next run;
+    # fut is a batch call (one entry per text) or, with single, one resume's call
+    try:
+        answer = fut.result()[0]
+    except Exception:
+        return
+    if single:
+        answer = [answer]
+    remember_answers([(t, s) for t, s in zip(doc_texts, answer or ()) if s is not None])
+
 # ---------- Streamlit UI ----------
 st.set_page_config(page_title="Skill Extractor", layout="wide")
 st.title("Resume Skill Extractor (PDF, DOCX, TXT)")
@@ -315,22 +238,20 @@ else:
 if uploaded:
     results = {}
     with st.spinner("Processing..."):
+        # files are parsed straight from the uploaded bytes, no temp files
+        files = []
         for f in uploaded:
-            # save to temp file because pdfplumber / docx need file path
-            suffix = os.path.splitext(f.name)[1].lower()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(f.read())
-                tmp_path = tmp.name
-            try:
-                out = process_resume_file(tmp_path, api_key)
+            data = f.getvalue()
+            files.append((file_digest(data), data, os.path.splitext(f.name)[1].lower()))
+        try:
+            # parsed text and model answers are kept per file, so a rerun only redoes what
+            # is missing (a model call that failed last time is tried again)
+            outs = process_resume_batch(files, api_key)
+            for f, out in zip(uploaded, outs):
                 results[f.name] = out
-            except Exception as e:
+        except Exception as e:
+            for f in uploaded:
                 results[f.name] = {"error": str(e)}
-            finally:
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
 
    # Clean output: show ONLY the extracted skills
     for fname, out in results.items():
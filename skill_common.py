@@ -0,0 +1,593 @@
+# skill_common.py
+# text extraction, skill normalization / categorization, and the Gemini calls and caches
+# around them, shared by skill.py and skill_extractor.py
+import streamlit as st
+import os
+import random
+import re
+import json
+import hashlib
+import time
+import io
+import threading
+import multiprocessing
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, List, Optional
+
+# ---------- Optional dependencies ----------
+# PyMuPDF is preferred for PDFs (C-backed, much faster); pdfplumber is the fallback
+try:
+    import pymupdf
+except Exception:
+    pymupdf = None
+
+try:
+    import pdfplumber
+except Exception:
+    pdfplumber = None
+
+# redis is optional: with REDIS_URL set, model answers are shared between server instances
+try:
+    import redis
+except Exception:
+    redis = None
+
+# ---------- Optional Gemini client wrapper ----------
+# without the client (or a key) callers get no answer and fall back to their local path
+GEMINI_CLIENT = None
+try:
+    from google import genai as _genai
+    GEMINI_CLIENT = _genai
+except Exception:
+    GEMINI_CLIENT = None
+
+# ---------- Precompiled patterns ----------
+_RE_UNDERSCORE_TAB = re.compile(r'[\_\t]+')
+_RE_SLASH = re.compile(r'\s*[\/\\]+\s*')
+_RE_DOT_NONDIGIT = re.compile(r'(?<!\d)\.(?!\d)')
+_RE_USB30 = re.compile(r'\busb\s+3\s+0\b')
+
+# ---------- Text extraction ----------
+def _collapse_ws(s: str) -> str:
+    # runs of whitespace -> one space, trimmed; str.split() does this in C without the regex engine
+    return " ".join(s.split())
+
+def _join_pages(page_texts) -> str:
+    # collapse each page as it is produced so only one raw page is alive at a time
+    return " ".join(t for t in (_collapse_ws(pt) for pt in page_texts) if t)
+
+# pdfplumber's layout analysis is pure Python (tens of ms per page), so longer PDFs can be
+# split into page ranges parsed in parallel processes; PyMuPDF reads a whole resume in a
+# few milliseconds, less than starting a process pool costs, so it always runs serially
+PDF_SERIAL_MAX_PAGES = 3
+
+def _pdf_page_texts(data: bytes, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    # raw pdfplumber text of pages [start, stop), or to the end when stop is None
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [p.extract_text() or "" for p in pdf.pages[start:stop]]
+
+def _pdf_pages_parallel(data: bytes, n_pages: int) -> Optional[List[str]]:
+    # only with fork: workers start from this process instead of re-importing Streamlit
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    workers = min(8, os.cpu_count() or 1, n_pages // 2)
+    if workers < 2:
+        return None
+    step = -(-n_pages // workers)
+    bounds = [(i, min(i + step, n_pages)) for i in range(0, n_pages, step)]
+    try:
+        with ProcessPoolExecutor(max_workers=len(bounds), mp_context=multiprocessing.get_context("fork")) as ex:
+            parts = list(ex.map(_pdf_page_texts, [data] * len(bounds), *zip(*bounds)))
+    except Exception:
+        return None
+    return [t for part in parts for t in part]
+
+def extract_text_from_pdf(data: bytes, split_pages: bool = False) -> str:
+    # split_pages: this file is being extracted on its own, so its pages may be spread
+    # over processes; batch callers already parse several files at once and leave it off
+    if pymupdf is not None:
+        with pymupdf.open(stream=data, filetype="pdf") as doc:
+            return _join_pages(doc.load_page(i).get_text("text") for i in range(doc.page_count))
+    if pdfplumber is None:
+        raise RuntimeError("Install PyMuPDF or pdfplumber: pip install pymupdf")
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        n_pages = len(pdf.pages)
+        if not split_pages or n_pages <= PDF_SERIAL_MAX_PAGES:
+            return _join_pages(p.extract_text() or "" for p in pdf.pages)
+    pages = _pdf_pages_parallel(data, n_pages)
+    if pages is None:
+        pages = _pdf_page_texts(data)
+    return _join_pages(pages)
+
+# WordprocessingML tags; .docx text lives in <w:t> runs inside <w:p> paragraphs
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_T = _W_NS + "t"
+_W_P = _W_NS + "p"
+_W_BREAKS = {_W_NS + "tab", _W_NS + "br", _W_NS + "cr"}
+
+def extract_text_from_docx(data: bytes) -> str:
+    # stream word/document.xml instead of building python-docx's object tree;
+    # body paragraphs and table-cell paragraphs are both plain <w:p> elements
+    parts = []
+    runs = []
+    with zipfile.ZipFile(io.BytesIO(data)) as z, z.open("word/document.xml") as f:
+        for _, elem in ET.iterparse(f):
+            tag = elem.tag
+            if tag == _W_T:
+                if elem.text:
+                    runs.append(elem.text)
+            elif tag in _W_BREAKS:
+                runs.append(" ")
+            elif tag == _W_P:
+                # runs of one paragraph join without a separator (words can span runs)
+                if runs:
+                    parts.append("".join(runs))
+                    runs = []
+                elem.clear()
+    if runs:
+        parts.append("".join(runs))
+    return _collapse_ws(" ".join(parts))
+
+def extract_text_from_txt(data: bytes) -> str:
+    return _collapse_ws(data.decode('utf-8', errors='ignore'))
+
+def extract_text(data: bytes, ext: str, split_pages: bool = False) -> str:
+    # uploads are handled in memory: data is the file content, ext its extension (".pdf")
+    ext = ext.lower()
+    if ext == ".pdf":
+        return extract_text_from_pdf(data, split_pages)
+    if ext == ".docx":
+        return extract_text_from_docx(data)
+    if ext == ".txt":
+        return extract_text_from_txt(data)
+    raise ValueError("Unsupported file type. Supported: .pdf, .docx, .txt")
+
+# ---------- Normalization + categorization ----------
+NORMALIZE_MAP = {
+    "react.js": "react",
+    "reactjs": "react",
+    "nodejs": "node.js",
+    "node js": "node.js",
+    "powerbi": "power bi",
+    "u boot": "u-boot",
+    "u_boot": "u-boot",
+    "device-tree": "device tree",
+    "embedded c": "c",
+    "c plus plus": "c++",
+    "cplusplus": "c++",
+    "usb 3 0": "usb 3.0",
+    "usb3.0": "usb 3.0",
+    "wi fi": "wi-fi",
+    "wi-fi": "wi-fi",
+    "i 2 c": "i2c",
+    "i 2 s": "i2s",
+    "yocto project": "yocto",
+    "petalinux sdk": "petalinux",
+    "system verilog": "systemverilog",
+    "devops": "devops",
+    "microcontrollers": "microcontroller"
+}
+
+# all map keys in one alternation, longest first so the most specific key wins;
+# identity entries ("wi-fi" -> "wi-fi") would only add branches, so they are left out
+_NORM_RE = re.compile('|'.join(re.escape(k) for k in sorted(NORMALIZE_MAP, key=len, reverse=True)
+                               if NORMALIZE_MAP[k] != k))
+
+def _norm_repl(m) -> str:
+    return NORMALIZE_MAP[m.group(0)]
+
+# forms that normalize to themselves; filled below once the category sets exist
+_CANON = frozenset()
+
+def normalize_token(tok: str) -> str:
+    if not tok:
+        return tok
+    s = tok.strip().lower()
+    if s in _CANON:
+        return s
+    s = _RE_UNDERSCORE_TAB.sub(' ', s)
+    s = _RE_SLASH.sub(' / ', s)
+    s = s.replace(',', ' ')
+    s = _collapse_ws(s)
+    s = _NORM_RE.sub(_norm_repl, s)
+    s = _RE_DOT_NONDIGIT.sub(' ', s)
+    s = s.strip()
+    s = _RE_USB30.sub('usb 3.0', s)
+    s = _collapse_ws(s)
+    if s == 'node':
+        s = 'node.js'
+    if s == 'reactjs':
+        s = 'react'
+    # dot removal above can split a canonical form again ("node.js" -> "node js")
+    s = _NORM_RE.sub(_norm_repl, s)
+    return _collapse_ws(s)
+
+def finalize_skills(skills_raw) -> List[str]:
+    # normalize + dedupe in one pass over the raw model / keyword output
+    # (dict keeps insertion order, so the first spelling's position wins)
+    return list(dict.fromkeys(t for t in (normalize_token(s) for s in skills_raw if isinstance(s, str)) if t))
+
+LANGUAGES = {"c", "c++", "c#", "python", "java", "javascript", "typescript", "go", "rust", "ruby", "php", "scala", "kotlin", "swift", "r"}
+TOOLS = {"git", "gdb", "cmake", "make", "gcc", "clang", "vivado", "quartus", "jtag", "docker", "helm", "ansible"}
+PROTOCOLS = {"i2c", "spi", "uart", "gpio", "pcie", "usb", "ethernet", "can", "i2s", "wi-fi", "wifi", "lte", "bluetooth"}
+PLATFORMS = {"embedded linux", "yocto", "petalinux", "u-boot", "raspberry pi", "stm32", "arm", "nxp", "imx", "xilinx zynq", "xilinx rfsoc", "xilinx mpsoc"}
+DRIVERS = {"kernel drivers", "device drivers", "driver development", "bootloader", "board bring-up", "bsp", "firmware", "kernel", "linux kernel"}
+OTHER_HINTS = {"linux", "bash", "shell", "systemd", "sysvinit", "excel", "tableau", "power bi", "etl", "spark", "hadoop"}
+
+# most skills the model returns are already canonical ("python", "i2c"), so
+# normalize_token returns them without running the substitutions; only forms the full
+# pipeline leaves unchanged qualify ("next.js" does not: it becomes "next js")
+_canon_candidates = list(dict.fromkeys(c for group in (NORMALIZE_MAP.values(), LANGUAGES, TOOLS, PROTOCOLS, PLATFORMS, DRIVERS, OTHER_HINTS)
+                                       for c in group))
+_CANON = frozenset(c for c in _canon_candidates if normalize_token(c) == c)
+
+# result buckets, in the order every "categories" dict lists them
+_CAT_KEYS = ("languages", "tools", "protocols", "platforms", "drivers", "other")
+
+def _empty_cats() -> dict:
+    return {k: [] for k in _CAT_KEYS}
+
+def categorize_skills(skills: List[str]) -> dict:
+    # {category: [skills]} with every category present; skills are normalized (lowercase)
+    categories = _empty_cats()
+    for s in skills:
+        categories[categorize_skill(s, already_lower=True)].append(s)
+    return categories
+
+# exact-match index: one dict lookup per skill (filled lowest priority first so
+# a skill listed in two sets keeps the category the old if-chain gave it)
+_CAT_INDEX = {}
+for _cat, _members in (("other", OTHER_HINTS), ("drivers", DRIVERS), ("platforms", PLATFORMS),
+                       ("protocols", PROTOCOLS), ("tools", TOOLS), ("languages", LANGUAGES)):
+    for _m in _members:
+        _CAT_INDEX[_m.lower()] = _cat
+
+# substring hints in priority order, used when the skill is not an exact member
+_CAT_HINTS = (
+    ("drivers", ("driver", "kernel", "bootloader", "bsp", "board bring-up", "firmware")),
+    ("platforms", ("linux", "embedded", "yocto", "petalinux", "u-boot")),
+    ("tools", ("aws", "azure", "gcp", "docker", "kubernetes", "terraform", "ansible")),
+    ("protocols", ("i2c", "spi", "uart", "gpio", "usb", "ethernet", "can", "i2s", "bluetooth", "wi-fi")),
+    ("languages", ("python", "java", "c++", "c#", "javascript", "typescript", "go", "rust")),
+)
+_HINT_RANK = {}
+for _rank, (_cat, _hints) in enumerate(_CAT_HINTS):
+    for _h in _hints:
+        _HINT_RANK.setdefault(_h, (_rank, _cat))
+# zero-width lookahead reports overlapping hits, so one scan sees every hint present
+_CAT_HINT_RE = re.compile('(?=(' + '|'.join(re.escape(h) for h in sorted(_HINT_RANK, key=_HINT_RANK.get)) + '))')
+
+def categorize_skill(skill: str, already_lower: bool = False) -> str:
+    # normalized tokens are lowercase already; callers holding them skip the copy
+    low = skill if already_lower else skill.lower()
+    cat = _CAT_INDEX.get(low)
+    if cat:
+        return cat
+    best = min((_HINT_RANK[m.group(1)] for m in _CAT_HINT_RE.finditer(low)), default=None)
+    return best[1] if best else "other"
+
+# ---------- Gemini prompt builder & caller ----------
+GEMINI_MODEL = "gemini-2.5-flash"
+
+def build_skills_prompt(resume_text: str, max_chars=15000) -> str:
+    if len(resume_text) > max_chars:
+        resume_text = resume_text[:max_chars]
+    prompt = f'''
+You are an extractor. Given the resume text below, return ONLY a single JSON object:
+
+{{"skills": [<list of canonical short skill strings>] }}
+
+Rules:
+- Return skill tokens like "python", "c++", "embedded linux", "device tree", "u-boot", "yocto", "i2c", "spi", "git".
+- Normalize common variants (react.js -> react, node js -> node.js, powerbi -> power bi).
+- Deduplicate and return only skills actually mentioned in the resume.
+- Do NOT include company names, addresses, or long descriptive sentences.
+- Output EXACTLY one JSON object and nothing else.
+
+Resume:
+\"\"\"{resume_text}\"\"\"
+'''.strip()
+    return prompt
+
+def build_batch_skills_prompt(doc_texts: List[str], what: str = "documents", max_chars=15000) -> str:
+    # what: how the intro line describes the documents ("resumes", ...)
+    docs = []
+    for i, text in enumerate(doc_texts, 1):
+        docs.append(f'### Document {i}\n"""{text[:max_chars]}"""')
+    joined = "\n\n".join(docs)
+    prompt = f'''
+You are an extractor. Given the {len(doc_texts)} {what} below, return ONLY a single JSON object:
+
+{{"documents": [{{"idx": <document number>, "skills": [<list of canonical short skill strings>]}}, ...] }}
+
+Rules:
+- Include one entry per document, using the number from its "### Document N" header as idx.
+- Return skill tokens like "python", "c++", "embedded linux", "device tree", "u-boot", "yocto", "i2c", "spi", "git".
+- Normalize common variants (react.js -> react, node js -> node.js, powerbi -> power bi).
+- Deduplicate and return only skills actually mentioned in that document.
+- Do NOT include company names, addresses, or long descriptive sentences.
+- Output EXACTLY one JSON object and nothing else.
+
+{joined}
+'''.strip()
+    return prompt
+
+_JSON_DECODER = json.JSONDecoder()
+
+def _decode_first(raw: str, opener: str):
+    # decode the JSON value at the first `opener` that starts one and ignore whatever
+    # follows it (markdown fences, trailing chatter) instead of a greedy DOTALL regex;
+    # a stray brace in leading prose just moves the search on to the next one
+    idx = raw.find(opener)
+    while idx >= 0:
+        try:
+            return _JSON_DECODER.raw_decode(raw, idx)[0]
+        except ValueError:
+            idx = raw.find(opener, idx + 1)
+    return None
+
+def parse_json_object(raw: str) -> Optional[dict]:
+    obj = _decode_first(raw, "{")
+    return obj if isinstance(obj, dict) else None
+
+def parse_json_array(raw: str) -> Optional[List[str]]:
+    # replies that skip the {"skills": ...} wrapper: decode the first JSON array instead
+    arr = _decode_first(raw, "[")
+    return [x for x in arr if isinstance(x, str)] if isinstance(arr, list) else None
+
+# one client per key for the whole server process: reruns and worker threads share
+# its connection pool instead of re-creating it on every request
+@st.cache_resource(show_spinner=False)
+def make_gemini_client(api_key: str):
+    try:
+        return GEMINI_CLIENT.Client(api_key=api_key)
+    except Exception:
+        try:
+            GEMINI_CLIENT.configure(api_key=api_key)
+            return GEMINI_CLIENT
+        except Exception:
+            return None
+
+# base of httpx's timeout, connect and protocol errors (the transport under google-genai);
+# matched by name so httpx need not be importable here
+_TRANSPORT_ERROR_NAMES = frozenset({"TransportError"})
+
+def _should_retry(exc: Exception) -> bool:
+    # the HTTP status is in .code (google-genai, google.api_core) or .status_code;
+    # rate limits and server errors can pass on a later try, other 4xx (bad key,
+    # bad request) fail the same way again
+    code = getattr(exc, "code", None)
+    if not isinstance(code, int):
+        code = getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    # no status: retry connection failures and timeouts only (OSError covers the
+    # builtin ones and requests'), not bugs such as a TypeError on a bad reply
+    if isinstance(exc, OSError):
+        return True
+    return any(c.__name__ in _TRANSPORT_ERROR_NAMES for c in type(exc).__mro__)
+
+def _backoff_delay(attempt: int) -> float:
+    # exponential with jitter, so parallel requests do not retry in lockstep
+    return min(8.0, 0.5 * 2 ** attempt) + random.random() * 0.25
+
+def call_gemini_for_skills(resume_text: str, api_key: str, max_retries=2) -> Tuple[Optional[List[str]], str]:
+    if not api_key or GEMINI_CLIENT is None:
+        return None, ""
+    prompt = build_skills_prompt(resume_text)
+    client = make_gemini_client(api_key)
+    if client is None:
+        return None, ""
+    for attempt in range(max_retries + 1):
+        try:
+            resp = client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+            raw = (resp.text if hasattr(resp, "text") else str(resp)) or ""
+            obj = parse_json_object(raw)
+            if obj is not None:
+                skills = obj.get("skills", [])
+                if isinstance(skills, list):
+                    return skills, raw
+            items = parse_json_array(raw)
+            if items:
+                return items, raw
+            return None, raw
+        except Exception as e:
+            if attempt < max_retries and _should_retry(e):
+                time.sleep(_backoff_delay(attempt))
+                continue
+            return None, "<error: {}>".format(e)
+
+def call_gemini_for_skills_batch(doc_texts: List[str], api_key: str, what: str = "documents", max_retries=2) -> Tuple[Optional[List[Optional[List[str]]]], str]:
+    # one request for every document; returns (None, ...) when the request itself failed,
+    # otherwise one entry per document (None where the reply did not parse or cover it)
+    if not api_key or GEMINI_CLIENT is None or not doc_texts:
+        return None, ""
+    client = make_gemini_client(api_key)
+    if client is None:
+        return None, ""
+    prompt = build_batch_skills_prompt(doc_texts, what)
+    for attempt in range(max_retries + 1):
+        try:
+            resp = client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+            raw = (resp.text if hasattr(resp, "text") else str(resp)) or ""
+            out = [None] * len(doc_texts)
+            obj = parse_json_object(raw)
+            entries = obj.get("documents") if obj is not None else None
+            if not isinstance(entries, list):
+                return out, raw
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                idx = entry.get("idx")
+                skills = entry.get("skills")
+                if isinstance(idx, int) and 1 <= idx <= len(out) and isinstance(skills, list):
+                    out[idx - 1] = skills
+            return out, raw
+        except Exception as e:
+            if attempt < max_retries and _should_retry(e):
+                time.sleep(_backoff_delay(attempt))
+                continue
+            return None, "<error: {}>".format(e)
+
+# ---------- Model answer cache (keyed on extracted text) ----------
+# the same text always gets the same skills back, so answers are reused across uploads,
+# sessions, restarts and both apps (they ask with the same rules); the file holds
+# {namespaced text digest: skills}
+ANSWER_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "skill_extraction", "answers.json")
+ANSWER_CACHE_MAX = 2000
+# bump when the prompt or parsing changes, so answers to the old prompt are not reused
+ANSWER_VERSION = "v2"
+_ANSWER_NS = "%s:%s:" % (ANSWER_VERSION, GEMINI_MODEL)
+# new answers are written to disk in the background, at most once per this many seconds
+ANSWER_FLUSH_DELAY_S = 2.0
+
+# optional second level in Redis (REDIS_URL) so several server instances share answers
+ANSWER_TTL_S = 24 * 3600
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "ignore"), digest_size=16).hexdigest()
+
+def get_redis_url() -> str:
+    try:
+        url = st.secrets.get("REDIS_URL")
+        if url:
+            return url
+    except Exception:
+        pass
+    return os.environ.get("REDIS_URL", "")
+
+@st.cache_resource(show_spinner=False)
+def make_redis_client(url: str):
+    if not url or redis is None:
+        return None
+    try:
+        # short timeouts: an unreachable cache must not hold up extraction
+        return redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    except Exception:
+        return None
+
+def _answer_key(text: str) -> str:
+    return _ANSWER_NS + text_digest(text)
+
+def _load_answer_file() -> dict:
+    try:
+        with open(ANSWER_CACHE_PATH, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    # answers from another prompt version or model are dropped on load
+    return {k: v for k, v in data.items() if k.startswith(_ANSWER_NS) and isinstance(v, list) and v}
+
+@st.cache_resource(show_spinner=False)
+def answer_store():
+    # loaded once per server process and shared by every session
+    return _load_answer_file(), threading.Lock()
+
+def lookup_answers(texts: List[str]) -> List[Optional[List[str]]]:
+    # local store first, then one Redis round trip for whatever it did not have
+    store, lock = answer_store()
+    keys = [_answer_key(t) for t in texts]
+    out = [store.get(k) for k in keys]
+    out = [s if isinstance(s, list) and s else None for s in out]
+    missing = [i for i, s in enumerate(out) if s is None]
+    client = make_redis_client(get_redis_url()) if missing else None
+    if client is not None:
+        try:
+            raws = client.mget(["skills:" + keys[i] for i in missing])
+        except Exception:
+            raws = []
+        with lock:
+            for i, raw in zip(missing, raws):
+                try:
+                    skills = json.loads(raw) if raw else None
+                except ValueError:
+                    skills = None
+                if isinstance(skills, list) and skills:
+                    out[i] = store[keys[i]] = skills
+    return out
+
+_flush_lock = threading.Lock()
+_flush_timer = None
+
+def _schedule_answer_flush():
+    global _flush_timer
+    with _flush_lock:
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(ANSWER_FLUSH_DELAY_S, _flush_answers)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+def _flush_answers():
+    global _flush_timer
+    with _flush_lock:
+        _flush_timer = None
+    store, lock = answer_store()
+    with lock:
+        ours = dict(store)
+    # both apps (and every server process) write this file, so start from what is on
+    # disk now and lay this process's answers over it instead of replacing it wholesale
+    merged = _load_answer_file()
+    for k in ours:
+        merged.pop(k, None)
+    merged.update(ours)
+    while len(merged) > ANSWER_CACHE_MAX:
+        del merged[next(iter(merged))]  # oldest first
+    try:
+        os.makedirs(os.path.dirname(ANSWER_CACHE_PATH), exist_ok=True)
+        tmp = "%s.%d.tmp" % (ANSWER_CACHE_PATH, os.getpid())
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(merged, fh)
+        os.replace(tmp, ANSWER_CACHE_PATH)
+    except OSError:
+        pass
+
+def remember_answers(pairs: List[Tuple[str, List[str]]]):
+    # an empty list is as likely a reply that went wrong as a document without
+    # skills, so it is not kept
+    pairs = [(_answer_key(text), skills) for text, skills in pairs if skills]
+    if not pairs:
+        return
+    store, lock = answer_store()
+    with lock:
+        for key, skills in pairs:
+            store.pop(key, None)
+            store[key] = skills
+        while len(store) > ANSWER_CACHE_MAX:
+            del store[next(iter(store))]  # oldest first
+    _schedule_answer_flush()
+    client = make_redis_client(get_redis_url())
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, skills in pairs:
+                pipe.set("skills:" + key, json.dumps(skills), ex=ANSWER_TTL_S)
+            pipe.execute()
+        except Exception:
+            pass
+
+# ---------- Upload caching (keyed on file content) ----------
+def file_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# extracted text per file digest, so a file seen before (in any session, or next to
+# different uploads) is not parsed again
+TEXT_CACHE_MAX = 256
+
+@st.cache_resource(show_spinner=False)
+def text_store():
+    return {}, threading.Lock()
+
+def lookup_text(digest: str) -> Optional[str]:
+    store, _ = text_store()
+    return store.get(digest)
+
+def remember_text(digest: str, text: str):
+    store, lock = text_store()
+    with lock:
+        store[digest] = text
+        while len(store) > TEXT_CACHE_MAX:
+            del store[next(iter(store))]  # oldest first